@@ -0,0 +1,12 @@
+# Shared by both Lambdas, which ship in the same container image
+
+# Maps every non-alphanumeric ASCII character to an underscore for str.translate
+NON_ALNUM_TO_UNDERSCORE = str.maketrans({c: '_' for c in map(chr, range(128)) if not c.isalnum()})
+
+def clean_name(name: str) -> str:
+    """Lower-case a name and replace every non-alphanumeric character with an underscore"""
+    cleaned = str(name).lower().translate(NON_ALNUM_TO_UNDERSCORE)
+    if not cleaned.isascii():
+        # The translation table only covers ASCII
+        cleaned = ''.join(c if c.isalnum() else '_' for c in cleaned)
+    return cleaned
@@ -1,58 +1,102 @@
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 import pandas as pd
-from io import BytesIO
 import logging
 import os
+import shutil
+import tempfile
+from typing import BinaryIO
+from concurrent.futures import ThreadPoolExecutor
+
+from etl_common import clean_name
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Maximum number of sheets uploaded to S3 at the same time
+MAX_UPLOAD_WORKERS = 8
+
+# Workbooks larger than this are spooled to /tmp instead of memory
+MAX_IN_MEMORY_WORKBOOK_SIZE = 50 * 1024 * 1024
+
+# Copy large workbooks as parallel multipart parts when archiving
+ARCHIVE_TRANSFER_CONFIG = TransferConfig(multipart_threshold=8 * 1024 * 1024, max_concurrency=10)
+
+# Created once per container so warm invocations reuse the client; the larger
+# pool covers the concurrent sheet uploads
+S3_CLIENT = boto3.client('s3', config=Config(max_pool_connections=50, retries={'mode': 'adaptive'}))
+
 def clean_sheet_name(name: str) -> str:
     """Clean sheet name for use in file naming"""
-    return ''.join(c if c.isalnum() else '_' for c in str(name).lower())
+    return clean_name(name)
 
-def process_excel_to_csvs(excel_file: BytesIO, filename: str, s3_client, bucket: str) -> list:
+def drop_trailing_empty_rows(df: pd.DataFrame) -> pd.DataFrame:
+    """Drop the all-empty rows that stray formatting leaves at the end of a sheet"""
+    last_row = df.last_valid_index()
+    if last_row is None:
+        return df.iloc[0:0]
+    return df.loc[:last_row]
+
+def upload_sheet_csv(df: pd.DataFrame, csv_key: str, s3_client, bucket: str) -> str:
+    """Convert a sheet to CSV and upload it to S3"""
+    # Write gzipped CSV to a temporary file so the payload is never copied in memory;
+    # compresslevel=1 keeps most of the size reduction at a fraction of the CPU cost
+    with tempfile.TemporaryFile() as csv_file:
+        df.to_csv(csv_file, index=False, compression={'method': 'gzip', 'compresslevel': 1})
+        csv_file.seek(0)
+        
+        # Upload to S3
+        s3_client.upload_fileobj(csv_file, bucket, csv_key)
+    
+    return csv_key
+
+def process_excel_to_csvs(excel_file: BinaryIO, filename: str, s3_client, bucket: str) -> list:
     """
-    Process all sheets in an Excel file and convert each to CSV
+    Process all sheets in an Excel file and convert each to gzipped CSV
     Returns list of created CSV files
     """
     created_files = []
     
-    # Get all sheet names
-    xlsx = pd.ExcelFile(excel_file)
-    logger.info(f"Found sheets: {xlsx.sheet_names}")
+    # Parse every sheet in a single pass with the Rust-based calamine engine
+    sheets = pd.read_excel(excel_file, sheet_name=None, engine='calamine')
+    logger.info(f"Found sheets: {list(sheets)}")
+    
+    if not sheets:
+        return created_files
     
-    for sheet_name in xlsx.sheet_names:
-        try:
+    base_name = os.path.splitext(filename)[0]
+    
+    # Upload sheets concurrently; each PUT spends most of its time on the network
+    with ThreadPoolExecutor(max_workers=min(MAX_UPLOAD_WORKERS, len(sheets))) as executor:
+        futures = {}
+        used_keys = set()
+        for sheet_name, df in sheets.items():
             logger.info(f"Processing sheet: {sheet_name}")
-            
-            # Read the sheet
-            df = pd.read_excel(excel_file, sheet_name=sheet_name)
+            df = drop_trailing_empty_rows(df)
             logger.info(f"Sheet {sheet_name} has {len(df)} rows and {len(df.columns)} columns")
             
-            # Generate CSV filename
-            base_name = os.path.splitext(filename)[0]
+            # Generate CSV filename; distinct sheet names can clean to the same key,
+            # so suffix repeats rather than letting concurrent uploads overwrite each other
             clean_sheet = clean_sheet_name(sheet_name)
-            csv_key = f"processed/{base_name}_{clean_sheet}.csv"
-            
-            # Convert to CSV and upload
-            csv_buffer = BytesIO()
-            df.to_csv(csv_buffer, index=False)
-            csv_buffer.seek(0)
-            
-            # Upload to S3
-            s3_client.put_object(
-                Bucket=bucket,
-                Key=csv_key,
-                Body=csv_buffer.getvalue()
-            )
-            
-            created_files.append(csv_key)
-            logger.info(f"Successfully created {csv_key}")
+            csv_key = f"processed/{base_name}_{clean_sheet}.csv.gz"
+            suffix = 1
+            while csv_key in used_keys:
+                suffix += 1
+                csv_key = f"processed/{base_name}_{clean_sheet}_{suffix}.csv.gz"
+            used_keys.add(csv_key)
             
-        except Exception as e:
-            logger.error(f"Error processing sheet {sheet_name}: {str(e)}")
-            continue
+            futures[sheet_name] = executor.submit(upload_sheet_csv, df, csv_key, s3_client, bucket)
+        
+        for sheet_name, future in futures.items():
+            try:
+                csv_key = future.result()
+                created_files.append(csv_key)
+                logger.info(f"Successfully created {csv_key}")
+                
+            except Exception as e:
+                logger.error(f"Error processing sheet {sheet_name}: {str(e)}")
+                continue
     
     return created_files
 
@@ -63,11 +107,12 @@ def move_to_archived(s3_client, bucket: str, key: str):
         filename = os.path.basename(key)
         archived_key = f"archived/{filename}"
         
-        # Copy file to archived folder
-        s3_client.copy_object(
-            Bucket=bucket,
+        # Copy file to archived folder (multipart for large workbooks)
+        s3_client.copy(
             CopySource={'Bucket': bucket, 'Key': key},
-            Key=archived_key
+            Bucket=bucket,
+            Key=archived_key,
+            Config=ARCHIVE_TRANSFER_CONFIG
         )
         
         # Delete from original location
@@ -88,15 +133,16 @@ def lambda_handler(event, context):
         
         logger.info(f"Processing {filename} from {bucket}")
         
-        # Initialize S3
-        s3 = boto3.client('s3')
+        s3 = S3_CLIENT
         
-        # Read Excel file
+        # Stream the Excel file into a seekable buffer without an extra in-memory copy
         response = s3.get_object(Bucket=bucket, Key=key)
-        excel_file = BytesIO(response['Body'].read())
-        
-        # Process all sheets
-        created_files = process_excel_to_csvs(excel_file, filename, s3, bucket)
+        with tempfile.SpooledTemporaryFile(max_size=MAX_IN_MEMORY_WORKBOOK_SIZE) as excel_file:
+            shutil.copyfileobj(response['Body'], excel_file)
+            excel_file.seek(0)
+            
+            # Process all sheets
+            created_files = process_excel_to_csvs(excel_file, filename, s3, bucket)
         
         # Move original file to archived folder
         move_to_archived(s3, bucket, key)
@@ -0,0 +1,34 @@
+import importlib.machinery
+import importlib.util
+import os
+import sys
+from io import StringIO
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+@pytest.fixture(scope='module')
+def csv2redshift():
+    """Import the csv2Redshift handler, which has no .py extension"""
+    os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    sys.path.insert(0, str(ROOT))
+    loader = importlib.machinery.SourceFileLoader('csv2Redshift', str(ROOT / 'csv2Redshift'))
+    spec = importlib.util.spec_from_loader('csv2Redshift', loader)
+    module = importlib.util.module_from_spec(spec)
+    loader.exec_module(module)
+    return module
+
+
+def test_text_column_with_nulls_is_sized_from_its_values(csv2redshift):
+    df = pd.read_csv(StringIO(f"id,t\n1,{'x' * 300}\n2,\n"))
+    assert csv2redshift.detect_data_type(df['t']) == 'VARCHAR(600)'
+
+
+def test_iso_date_column_with_nulls_is_date(csv2redshift):
+    assert csv2redshift.detect_data_type(pd.Series(['2024-01-01', None])) == 'DATE'
+    df = pd.read_csv(StringIO("id,d\n1,2024-01-01\n2,\n3,2024-02-29\n"))
+    assert csv2redshift.detect_data_type(df['d']) == 'DATE'